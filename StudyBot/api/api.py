@@ -57,6 +57,11 @@ class LeaderboardRequest(BaseModel):
     guild_id: int
     limit: int = 10
 
+class GoalSet(BaseModel):
+    user_id: int
+    guild_id: int
+    hours: float
+
 
 # Endpoints
 
@@ -233,3 +238,32 @@ def guild_leaderboard_api(body: LeaderboardRequest):
 
     db.close()
     return {"leaderboard": leaderboard_entries}
+
+@app.get("/streak/{guild_id}/{user_id}")
+def get_streak_api(guild_id: int, user_id: int):
+    db = SessionLocal()
+    streak = crud.get_streak(db, user_id, guild_id)
+    db.close()
+
+    last_active_day = streak['last_active_day']
+
+    return {
+        "current_streak": streak['current_streak'],
+        "longest_streak": streak['longest_streak'],
+        "last_active_day": last_active_day.strftime("%Y-%m-%d") if last_active_day else None,
+        "weekly_goal_seconds": streak['weekly_goal_seconds'],
+        "week_seconds": streak['week_seconds']
+    }
+
+@app.post("/goal/set")
+def set_goal_api(body: GoalSet):
+    if not 0 <= body.hours <= 168:
+        return {"error": "Goal must be between 0 and 168 hours."}
+
+    db = SessionLocal()
+    crud.get_or_create_user(db, body.user_id, body.guild_id)
+    streak = crud.set_weekly_goal(db, body.user_id, body.guild_id, int(body.hours * 3600))
+    goal_seconds = streak.weekly_goal_seconds
+    db.close()
+
+    return {"ok": True, "weekly_goal_seconds": goal_seconds}
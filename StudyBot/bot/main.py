@@ -198,4 +198,43 @@ async def leaderboard(interaction: discord.Interaction):
         seconds = total_seconds % 60
         msg += f"{idx}. **{entry['discord_name']}** -- {hours}h {minutes}m {seconds}s\n"
     await interaction.response.send_message(msg)
+
+@bot.tree.command(name="streak", description="Show your study streak and weekly goal progress")
+async def streak(interaction: discord.Interaction):
+    get_request = requests.get(f"{API_URL}/streak/{interaction.guild.id}/{interaction.user.id}")
+    data = get_request.json()
+
+    week_seconds = data["week_seconds"]
+    goal_seconds = data["weekly_goal_seconds"]
+
+    msg = (
+        f"**Your Study Streak:**\n\n"
+        f"Current Streak: {data['current_streak']} days\n"
+        f"Longest Streak: {data['longest_streak']} days\n"
+        f"This Week: {week_seconds // 3600}h {(week_seconds % 3600) // 60}m\n"
+    )
+
+    if goal_seconds:
+        percent = min(100, week_seconds * 100 // goal_seconds)
+        msg += f"Weekly Goal: {goal_seconds // 3600}h {(goal_seconds % 3600) // 60}m ({percent}%)\n"
+    else:
+        msg += "Weekly Goal: not set (use /setgoal)\n"
+
+    await interaction.response.send_message(msg)
+
+@bot.tree.command(name="setgoal", description="Set your weekly study goal in hours")
+@app_commands.describe(hours="Hours to study per week")
+async def setgoal(interaction: discord.Interaction, hours: app_commands.Range[float, 0, 168]):
+    post_request = requests.post(f"{API_URL}/goal/set", json={
+        "user_id": interaction.user.id,
+        "guild_id": interaction.guild.id,
+        "hours": hours
+    })
+
+    data = post_request.json()
+    if "error" in data:
+        await interaction.response.send_message(data["error"])
+        return
+
+    await interaction.response.send_message(f"Weekly goal set to **{hours:g} hours**.")
 bot.run(token)
@@ -0,0 +1,16 @@
+# Rebuild study streaks and weekly goal progress from existing history.
+# Run from the StudyBot directory: python -m database.backfill
+# Safe to run while the bot is up: writes made meanwhile wait (up to SQLite's busy timeout) for it to commit.
+from database import crud
+from database.db import SessionLocal
+
+
+def main():
+    db = SessionLocal()
+    count = crud.backfill_streaks(db)
+    db.close()
+    print(f"Backfilled streaks for {count} users.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime
-from .models import User, Guild, VoiceSession, UserEvent, Assignment
+from sqlalchemy import func, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta, time
+import heapq
+from .models import User, Guild, VoiceSession, UserEvent, Assignment, StudyStreak
 
 
 
@@ -56,6 +58,7 @@ def stop_task(db: Session, user_id: int, guild_id: int):
 
     ev.end_time = datetime.utcnow()
     ev.duration_seconds = int((ev.end_time - ev.start_time).total_seconds())
+    record_study_time(db, user_id, guild_id, ev.start_time, ev.duration_seconds)
 
     db.commit()
     return ev
@@ -83,6 +86,7 @@ def voice_leave(db: Session, user_id: int, guild_id: int, channel_id: int):
 
     vs.end_time = datetime.utcnow()
     vs.duration_seconds = int((vs.end_time - vs.start_time).total_seconds())
+    record_study_time(db, user_id, guild_id, vs.start_time, vs.duration_seconds)
     db.commit()
     return vs
 
@@ -159,4 +163,288 @@ def get_guild_leaderboard(db: Session, guild_id: int):
     # Sort by total time descending
     leaderboard.sort(key=lambda x: x['total_time'], reverse=True)
     
-    return leaderboard
\ No newline at end of file
+    return leaderboard
+
+
+# Streaks & Goals
+#
+# Days are UTC and weeks start on Monday. A session is split at UTC midnight so
+# each day it touches gets streak credit and its own share of the weekly total.
+# Pieces arrive in the order sessions close, so a long voice session can report
+# a day after a shorter task inside it already moved the streak on. A piece for
+# the day before the current run extends it backwards, joining the previous run
+# if that closes the gap. A piece for a week already moved past is not counted.
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _split_by_day(start_time: datetime, duration_seconds: int):
+    """Split a session into (day, seconds) pieces at each UTC midnight"""
+    if not duration_seconds or duration_seconds <= 0:
+        return []
+
+    pieces = []
+    remaining = duration_seconds
+    cursor = start_time
+    while remaining > 0:
+        next_midnight = datetime.combine(cursor.date() + timedelta(days=1), time.min)
+        seconds = min(remaining, int((next_midnight - cursor).total_seconds()))
+        if seconds > 0:
+            pieces.append((cursor.date(), seconds))
+        remaining -= seconds
+        cursor = next_midnight
+    return pieces
+
+
+def _apply_study_day(streak: StudyStreak, day, seconds: int):
+    """Fold one day's piece of a session into an in-memory StudyStreak (used by the backfill)"""
+    last = streak.last_active_day
+    start = streak.streak_start_day
+    prev_end = streak.prev_streak_end_day
+    day_before = day - timedelta(days=1)
+
+    if last is None:
+        streak.current_streak = 1
+        streak.streak_start_day = day
+        streak.last_active_day = day
+    elif last == day_before:
+        streak.current_streak += 1
+        streak.last_active_day = day
+    elif last < day_before:
+        streak.prev_streak_start_day = start
+        streak.prev_streak_end_day = last
+        streak.prev_streak_length = streak.current_streak
+        streak.current_streak = 1
+        streak.streak_start_day = day
+        streak.last_active_day = day
+    elif start == day + timedelta(days=1):
+        streak.current_streak += 1
+        streak.streak_start_day = day
+        if prev_end == day_before:
+            streak.current_streak += streak.prev_streak_length
+            streak.streak_start_day = streak.prev_streak_start_day
+            streak.prev_streak_start_day = None
+            streak.prev_streak_end_day = None
+            streak.prev_streak_length = 0
+    elif prev_end == day_before:
+        streak.prev_streak_end_day = day
+        streak.prev_streak_length += 1
+
+    streak.longest_streak = max(streak.longest_streak, streak.current_streak, streak.prev_streak_length)
+
+    week_start = _week_start(day)
+    if streak.week_start is None or week_start > streak.week_start:
+        streak.week_start = week_start
+        streak.week_seconds = seconds
+    elif week_start == streak.week_start:
+        streak.week_seconds += seconds
+
+
+def _study_day_values(day, seconds: int):
+    """The same fold as _apply_study_day, as SET values for one atomic UPDATE"""
+    last = StudyStreak.last_active_day
+    start = StudyStreak.streak_start_day
+    prev_start = StudyStreak.prev_streak_start_day
+    prev_end = StudyStreak.prev_streak_end_day
+    prev_length = StudyStreak.prev_streak_length
+    week = StudyStreak.week_start
+    day_before = day - timedelta(days=1)
+    week_start = _week_start(day)
+
+    # Branches in the same order as _apply_study_day; the first match wins
+    is_first = last.is_(None)
+    is_next = last == day_before
+    is_gap = last < day_before
+    is_back_join = (start == day + timedelta(days=1)) & (prev_end == day_before)
+    is_back = start == day + timedelta(days=1)
+    is_prev_next = prev_end == day_before
+    resets = is_first | is_gap
+
+    # SET expressions all see the old row, so the new lengths are spelled out for longest_streak too
+    new_streak = case(
+        (resets, 1),
+        (is_next, StudyStreak.current_streak + 1),
+        (is_back_join, StudyStreak.current_streak + 1 + prev_length),
+        (is_back, StudyStreak.current_streak + 1),
+        else_=StudyStreak.current_streak
+    )
+    new_prev_length = case(
+        (is_first | is_next, prev_length),
+        (is_gap, StudyStreak.current_streak),
+        (is_back_join, 0),
+        (is_back, prev_length),
+        (is_prev_next, prev_length + 1),
+        else_=prev_length
+    )
+    new_week = week.is_(None) | (week < week_start)
+
+    return {
+        StudyStreak.current_streak: new_streak,
+        StudyStreak.longest_streak: func.max(StudyStreak.longest_streak, new_streak, new_prev_length),
+        StudyStreak.streak_start_day: case(
+            (resets, day),
+            (is_next, start),
+            (is_back_join, prev_start),
+            (is_back, day),
+            else_=start
+        ),
+        StudyStreak.last_active_day: case((resets | is_next, day), else_=last),
+        StudyStreak.prev_streak_start_day: case(
+            (is_first | is_next, prev_start),
+            (is_gap, start),
+            (is_back_join, None),
+            else_=prev_start
+        ),
+        StudyStreak.prev_streak_end_day: case(
+            (is_first | is_next, prev_end),
+            (is_gap, last),
+            (is_back_join, None),
+            (is_back, prev_end),
+            (is_prev_next, day),
+            else_=prev_end
+        ),
+        StudyStreak.prev_streak_length: new_prev_length,
+        StudyStreak.week_start: case((new_week, week_start), else_=week),
+        StudyStreak.week_seconds: case(
+            (new_week, seconds),
+            (week == week_start, StudyStreak.week_seconds + seconds),
+            else_=StudyStreak.week_seconds
+        )
+    }
+
+
+def _ensure_streak(db: Session, user_id: int, guild_id: int):
+    # Upsert so two sessions closing at once for a new user can't both insert the row
+    db.execute(
+        sqlite_insert(StudyStreak)
+        .values(user_id=user_id, guild_id=guild_id, current_streak=0, longest_streak=0, prev_streak_length=0, weekly_goal_seconds=0, week_seconds=0)
+        .on_conflict_do_nothing()
+    )
+
+
+def record_study_time(db: Session, user_id: int, guild_id: int, start_time: datetime, duration_seconds: int):
+    # Called by stop_task / voice_leave before they commit, so the session close and streak update land together
+    pieces = _split_by_day(start_time, duration_seconds)
+    if not pieces:
+        return
+
+    _ensure_streak(db, user_id, guild_id)
+    for day, seconds in pieces:
+        db.query(StudyStreak).filter(StudyStreak.user_id == user_id, StudyStreak.guild_id == guild_id).update(
+            _study_day_values(day, seconds), synchronize_session=False
+        )
+
+
+def set_weekly_goal(db: Session, user_id: int, guild_id: int, goal_seconds: int):
+    _ensure_streak(db, user_id, guild_id)
+    db.query(StudyStreak).filter(StudyStreak.user_id == user_id, StudyStreak.guild_id == guild_id).update(
+        {StudyStreak.weekly_goal_seconds: goal_seconds}, synchronize_session=False
+    )
+    db.commit()
+    return db.query(StudyStreak).filter(StudyStreak.user_id == user_id, StudyStreak.guild_id == guild_id).first()
+
+
+def get_streak(db: Session, user_id: int, guild_id: int):
+    """Read streak and weekly goal progress for a user as of today (UTC)"""
+    streak = db.query(StudyStreak).filter(StudyStreak.user_id == user_id, StudyStreak.guild_id == guild_id).first()
+
+    today = datetime.utcnow().date()
+
+    if not streak:
+        return {
+            'current_streak': 0,
+            'longest_streak': 0,
+            'last_active_day': None,
+            'weekly_goal_seconds': 0,
+            'week_seconds': 0
+        }
+
+    # Stored values are as of the last session; a missed day breaks the streak and a new week resets progress
+    current_streak = streak.current_streak
+    if streak.last_active_day is None or today - streak.last_active_day > timedelta(days=1):
+        current_streak = 0
+
+    week_seconds = streak.week_seconds
+    if streak.week_start != _week_start(today):
+        week_seconds = 0
+
+    return {
+        'current_streak': current_streak,
+        'longest_streak': streak.longest_streak,
+        'last_active_day': streak.last_active_day,
+        'weekly_goal_seconds': streak.weekly_goal_seconds,
+        'week_seconds': week_seconds
+    }
+
+
+def backfill_streaks(db: Session, batch_size: int = 1000):
+    """Rebuild every StudyStreak row from closed task events and voice sessions in one streaming pass.
+
+    The whole rebuild runs in one BEGIN IMMEDIATE transaction, so sessions closed or goals set
+    meanwhile wait for it (up to SQLite's busy timeout) instead of being overwritten.
+    """
+    db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+    tasks = (
+        db.query(UserEvent.guild_id, UserEvent.user_id, UserEvent.end_time, UserEvent.start_time, UserEvent.duration_seconds)
+        .filter(UserEvent.event_type == "task", UserEvent.end_time.is_not(None), UserEvent.duration_seconds.is_not(None))
+        .order_by(UserEvent.guild_id, UserEvent.user_id, UserEvent.end_time)
+        .yield_per(batch_size)
+    )
+    voice = (
+        db.query(VoiceSession.guild_id, VoiceSession.user_id, VoiceSession.end_time, VoiceSession.start_time, VoiceSession.duration_seconds)
+        .filter(VoiceSession.end_time.is_not(None), VoiceSession.duration_seconds.is_not(None))
+        .order_by(VoiceSession.guild_id, VoiceSession.user_id, VoiceSession.end_time)
+        .yield_per(batch_size)
+    )
+
+    # Both inputs are sorted the same way, so merging replays each user's sessions in the order they closed
+    rows = heapq.merge(tasks, voice, key=lambda row: (row[0], row[1], row[2]))
+
+    # Goals are user settings rather than history, so carry them over
+    goals = {
+        (guild_id, user_id): goal
+        for guild_id, user_id, goal in db.query(StudyStreak.guild_id, StudyStreak.user_id, StudyStreak.weekly_goal_seconds)
+    }
+
+    rebuilt = {}
+    for guild_id, user_id, end_time, start_time, duration_seconds in rows:
+        pieces = _split_by_day(start_time, duration_seconds)
+        if not pieces:
+            continue
+
+        key = (guild_id, user_id)
+        streak = rebuilt.get(key)
+        if streak is None:
+            streak = StudyStreak(
+                user_id=user_id,
+                guild_id=guild_id,
+                current_streak=0,
+                longest_streak=0,
+                prev_streak_length=0,
+                weekly_goal_seconds=goals.get(key, 0),
+                week_seconds=0
+            )
+            rebuilt[key] = streak
+        for day, seconds in pieces:
+            _apply_study_day(streak, day, seconds)
+
+    # Users with a goal but no history keep their row with a reset streak
+    for key, goal in goals.items():
+        if key not in rebuilt:
+            guild_id, user_id = key
+            rebuilt[key] = StudyStreak(
+                user_id=user_id,
+                guild_id=guild_id,
+                current_streak=0,
+                longest_streak=0,
+                prev_streak_length=0,
+                weekly_goal_seconds=goal,
+                week_seconds=0
+            )
+
+    db.query(StudyStreak).delete()
+    db.add_all(rebuilt.values())
+    db.commit()
+    return len(rebuilt)
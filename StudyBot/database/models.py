@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Date, ForeignKey
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -53,4 +53,25 @@ class Assignment(Base):
     due_date = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    is_completed = Column(Integer, default=0)
\ No newline at end of file
+    is_completed = Column(Integer, default=0)
+
+class StudyStreak(Base):
+    __tablename__ = "StudyStreak"
+
+    # One row per user per guild, kept up to date as sessions close
+    user_id = Column(Integer, primary_key=True, nullable=False)
+    guild_id = Column(Integer, primary_key=True, nullable=False)
+
+    # Current run is streak_start_day..last_active_day; the run before it is kept so a late
+    # session that fills the gap between them can join the two
+    current_streak = Column(Integer, default=0)
+    longest_streak = Column(Integer, default=0)
+    streak_start_day = Column(Date, nullable=True)
+    last_active_day = Column(Date, nullable=True)
+    prev_streak_start_day = Column(Date, nullable=True)
+    prev_streak_end_day = Column(Date, nullable=True)
+    prev_streak_length = Column(Integer, default=0)
+
+    weekly_goal_seconds = Column(Integer, default=0)
+    week_start = Column(Date, nullable=True)
+    week_seconds = Column(Integer, default=0)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the same way api.py does, from the StudyBot directory
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,218 @@
+from datetime import datetime, date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import crud
+from database.models import Base, UserEvent, VoiceSession, StudyStreak
+
+USER_ID = 1
+GUILD_ID = 10
+
+
+class FrozenDatetime(datetime):
+    now_value = None
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now_value
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(crud, "datetime", FrozenDatetime)
+
+    def set_time(value):
+        FrozenDatetime.now_value = value
+
+    return set_time
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+# Helpers
+
+def close_task(db, start_time, end_time, user_id=USER_ID):
+    duration = int((end_time - start_time).total_seconds())
+    db.add(UserEvent(user_id=user_id, guild_id=GUILD_ID, event_type="task", event_name="study",
+                     start_time=start_time, end_time=end_time, duration_seconds=duration))
+    crud.record_study_time(db, user_id, GUILD_ID, start_time, duration)
+    db.commit()
+
+
+def close_voice(db, start_time, end_time, user_id=USER_ID):
+    duration = int((end_time - start_time).total_seconds())
+    db.add(VoiceSession(user_id=user_id, guild_id=GUILD_ID, channel_id=100,
+                        start_time=start_time, end_time=end_time, duration_seconds=duration))
+    crud.record_study_time(db, user_id, GUILD_ID, start_time, duration)
+    db.commit()
+
+
+def snapshot(db):
+    db.expire_all()
+    return sorted(
+        (s.guild_id, s.user_id, s.current_streak, s.longest_streak, s.last_active_day,
+         s.weekly_goal_seconds, s.week_start, s.week_seconds)
+        for s in db.query(StudyStreak).all()
+    )
+
+
+def get_row(db, user_id=USER_ID):
+    db.expire_all()
+    return db.query(StudyStreak).filter(StudyStreak.user_id == user_id, StudyStreak.guild_id == GUILD_ID).one()
+
+
+def assert_matches_backfill(db):
+    incremental = snapshot(db)
+    crud.backfill_streaks(db)
+    assert snapshot(db) == incremental
+
+
+# Tests
+
+def test_consecutive_days(db):
+    for day in (12, 13, 14):
+        close_task(db, datetime(2026, 10, day, 9), datetime(2026, 10, day, 10))
+
+    row = get_row(db)
+    assert row.current_streak == 3
+    assert row.longest_streak == 3
+    assert row.last_active_day == date(2026, 10, 14)
+    assert row.week_seconds == 3 * 3600
+    assert_matches_backfill(db)
+
+
+def test_gap_resets_current_streak(db):
+    for day in (12, 13, 15):
+        close_task(db, datetime(2026, 10, day, 9), datetime(2026, 10, day, 10))
+
+    row = get_row(db)
+    assert row.current_streak == 1
+    assert row.longest_streak == 2
+    assert_matches_backfill(db)
+
+
+def test_week_rollover(db):
+    close_task(db, datetime(2026, 10, 18, 9), datetime(2026, 10, 18, 11))
+    close_voice(db, datetime(2026, 10, 19, 9), datetime(2026, 10, 19, 10))
+
+    row = get_row(db)
+    assert row.current_streak == 2
+    assert row.week_start == date(2026, 10, 19)
+    assert row.week_seconds == 3600
+    assert_matches_backfill(db)
+
+
+def test_session_split_at_midnight(db):
+    # Sunday 23:00 to Monday 02:00 credits both days, only Monday's 2h count toward the new week
+    close_voice(db, datetime(2026, 10, 18, 23), datetime(2026, 10, 19, 2))
+
+    row = get_row(db)
+    assert row.current_streak == 2
+    assert row.last_active_day == date(2026, 10, 19)
+    assert row.week_start == date(2026, 10, 19)
+    assert row.week_seconds == 2 * 3600
+    assert_matches_backfill(db)
+
+
+def test_same_day_task_and_voice(db):
+    close_task(db, datetime(2026, 10, 12, 9), datetime(2026, 10, 12, 10))
+    close_voice(db, datetime(2026, 10, 12, 9, 30), datetime(2026, 10, 12, 11))
+
+    row = get_row(db)
+    assert row.current_streak == 1
+    assert row.longest_streak == 1
+    assert row.week_seconds == 3600 + 5400
+    assert_matches_backfill(db)
+
+
+def test_zero_length_session_is_ignored(db):
+    close_task(db, datetime(2026, 10, 12, 9), datetime(2026, 10, 12, 9))
+
+    assert snapshot(db) == []
+    assert_matches_backfill(db)
+
+
+def test_backfill_after_incremental_keeps_goals(db):
+    crud.set_weekly_goal(db, USER_ID, GUILD_ID, 10 * 3600)
+    crud.set_weekly_goal(db, 2, GUILD_ID, 5 * 3600)
+    close_task(db, datetime(2026, 10, 12, 9), datetime(2026, 10, 12, 10))
+    close_voice(db, datetime(2026, 10, 13, 22), datetime(2026, 10, 14, 1))
+    close_task(db, datetime(2026, 10, 12, 9), datetime(2026, 10, 12, 12), user_id=3)
+
+    assert get_row(db).weekly_goal_seconds == 10 * 3600
+    assert_matches_backfill(db)
+    assert get_row(db, user_id=2).weekly_goal_seconds == 5 * 3600
+
+
+def test_ensure_streak_is_idempotent(db):
+    crud.set_weekly_goal(db, USER_ID, GUILD_ID, 3600)
+    crud.record_study_time(db, USER_ID, GUILD_ID, datetime(2026, 10, 12, 9), 60)
+    db.commit()
+
+    row = get_row(db)
+    assert row.weekly_goal_seconds == 3600
+    assert row.week_seconds == 60
+    assert db.query(StudyStreak).count() == 1
+
+
+def test_session_spanning_midnight_closing_after_task_inside_it(db):
+    close_task(db, datetime(2026, 10, 17, 9), datetime(2026, 10, 17, 10))
+    # Monday task closes first, then the Sunday-to-Monday voice session around it
+    close_task(db, datetime(2026, 10, 19, 0, 10), datetime(2026, 10, 19, 0, 20))
+    close_voice(db, datetime(2026, 10, 18, 23), datetime(2026, 10, 19, 1))
+
+    row = get_row(db)
+    assert row.current_streak == 3
+    assert row.longest_streak == 3
+    assert row.streak_start_day == date(2026, 10, 17)
+    assert row.last_active_day == date(2026, 10, 19)
+    assert_matches_backfill(db)
+
+
+def test_late_session_joins_previous_run(db):
+    close_task(db, datetime(2026, 10, 10, 9), datetime(2026, 10, 10, 10))
+    close_task(db, datetime(2026, 10, 13, 0, 10), datetime(2026, 10, 13, 0, 20))
+    # Sunday 23:00 to Tuesday 01:00 fills Sunday and Monday, joining Saturday's run to Tuesday's
+    close_voice(db, datetime(2026, 10, 11, 23), datetime(2026, 10, 13, 1))
+
+    row = get_row(db)
+    assert row.current_streak == 4
+    assert row.longest_streak == 4
+    assert row.streak_start_day == date(2026, 10, 10)
+    assert row.prev_streak_end_day is None
+    assert_matches_backfill(db)
+
+
+def test_stop_task_records_streak(db, clock):
+    clock(datetime(2026, 10, 12, 9))
+    crud.start_task(db, USER_ID, GUILD_ID, "study")
+    clock(datetime(2026, 10, 12, 10))
+    crud.stop_task(db, USER_ID, GUILD_ID)
+
+    row = get_row(db)
+    assert row.current_streak == 1
+    assert row.last_active_day == date(2026, 10, 12)
+    assert row.week_seconds == 3600
+    assert_matches_backfill(db)
+
+
+def test_voice_leave_records_streak(db, clock):
+    clock(datetime(2026, 10, 18, 23))
+    crud.voice_join(db, USER_ID, GUILD_ID, 100)
+    clock(datetime(2026, 10, 19, 1))
+    crud.voice_leave(db, USER_ID, GUILD_ID, 100)
+
+    row = get_row(db)
+    assert row.current_streak == 2
+    assert row.last_active_day == date(2026, 10, 19)
+    assert row.week_seconds == 3600
+    assert_matches_backfill(db)